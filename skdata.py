@@ -1,16 +1,27 @@
+import os
 import re
 import sys
 import csv
 import json
-import time
+import mmap
+import fnmatch
+import struct
 import shutil
 import logging
 import zipfile
+import threading
 import requests
 import subprocess
 from pathlib import Path
 from collections import defaultdict
-from typing import List, Tuple, Dict
+from concurrent.futures import FIRST_EXCEPTION, Future, ThreadPoolExecutor, wait
+from operator import itemgetter
+from typing import Any, Callable, Iterator, List, Tuple, Dict
+
+try:
+    import orjson
+except ImportError:  # optional speedup; stdlib json is the fallback
+    orjson = None
 
 
 BASE_URL = "http://www.chillyroom.com/zh"
@@ -18,6 +29,32 @@ APK_REGEX = re.compile(
     r"https://apk\.chillyroom\.com/apks/[\w\d.\-]+/SoulKnight-release-chillyroom-([\w\d.\-]+)\.apk"
 )
 
+# Every key prefix _classify_langmap() cares about; none is a prefix of another.
+_LANG_PREFIX_RE = re.compile(
+    r"weapon/|weapon_|desc_evolution_|Buff_name_|Buff_info_|task/"
+    r"|material_|plant_|Pet_name_|Character"
+)
+_NEWLINE_RE = re.compile(r"\r\n|\r|\n")
+_TASK_RE = re.compile(r"task/([^_]+)(_title|_desc)?")
+_CHAR_SKIN_RE = re.compile(r"Character(\d+)_name_skin(\d+)")
+# export_needed_data_from_langmap() categories, tried in this order.
+_NEEDED_DATA_RE = re.compile(
+    r"(?P<skin>Character(?P<char_index>\d+)_name_skin(?P<skin_index>\d+))"
+    r"|(?P<pet>Pet_name_(?P<pet_id>\d+))"
+    r"|(?P<material>material_(?!.*(?:activity|book|fragment|tape|skill|new|money|multi|box)).*)"
+    r"|(?P<character_skill>Character\d+_skill_\d+_name)"
+)
+_WEAPON_SKIN_RE = re.compile(r"^(weapon_\w+)_s_\d+$")
+_WEAPON_UPGRADE_RE = re.compile(r"^desc_evolution_(weapon_\w+)$")
+_WEAPON_EXCLUDES = [
+    re.compile(r"^weapon_000.*xx\d*$"),
+    re.compile(r"^weapon_init.*xx\d*$"),
+    re.compile(r"^transform_weapon_.*"),
+]
+
+# Little-endian uint32 length prefix used throughout the I2 .dat layout.
+_U32 = struct.Struct("<I")
+
 ASSET_STUDIO_CLI_URL = (
     "https://github.com/aelurum/AssetStudio/releases/download/"
     "v0.18.0/AssetStudioModCLI_net6_win64.zip"
@@ -54,10 +91,66 @@ EXPORT_DIR = DATA_DIR / "export"
 ASSET_STUDIO_ZIP = DATA_DIR / "AssetStudio.zip"
 ASSET_STUDIO_DIR = DATA_DIR / "AssetStudio"
 
+COPY_BUFFER_SIZE = 1 << 20
+# Below this size mapping a JSON file costs more than simply reading it.
+MMAP_JSON_THRESHOLD = 4 << 20
 
-def download_file(url: str, dest: Path, chunk_size: int = 8192) -> None:
+
+def _load_json(path: Path) -> Any:
+    """
+    Parse the UTF-8 JSON file at `path`, through orjson when available.
+    Decode errors are json.JSONDecodeError either way.
     """
-    Download `url` to `dest` with a custom progress bar, download speed, and ETA.
+    if orjson is not None:
+        # orjson parses any buffer, so big files are read straight out of the
+        # page cache instead of being copied into a bytes object first.
+        if path.stat().st_size > MMAP_JSON_THRESHOLD:
+            with open(path, "rb") as f, mmap.mmap(
+                f.fileno(), 0, access=mmap.ACCESS_READ
+            ) as mm:
+                with memoryview(mm) as view:
+                    return orjson.loads(view)
+        return orjson.loads(path.read_bytes())
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    """
+    Replace `path` with `data` in one write to a sibling temp file, fsync'd
+    and then renamed over the target, so readers never see a partial file.
+    """
+    tmp_path = path.with_name(path.name + ".tmp")
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+
+def _dump_json(obj: Any, path: Path) -> None:
+    """
+    Write `obj` to `path` as UTF-8 JSON with sorted keys and 2-space indent,
+    through orjson when available. Both paths produce identical bytes.
+    """
+    if orjson is not None:
+        data = orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_SORT_KEYS)
+    else:
+        text = json.dumps(obj, indent=2, ensure_ascii=False, sort_keys=True)
+        data = text.encode("utf-8")
+    _write_atomic(path, data)
+
+
+def download_file(url: str, dest: Path, chunk_size: int = COPY_BUFFER_SIZE) -> None:
+    """
+    Download `url` to `dest`, streaming the response body to disk in
+    `chunk_size` blocks. The body goes to a `.part` file that is renamed
+    onto `dest` only once complete, so an interrupted download never leaves
+    a truncated `dest` behind.
     """
     dest.parent.mkdir(parents=True, exist_ok=True)
     print(f"Downloading: {url}")
@@ -65,61 +158,105 @@ def download_file(url: str, dest: Path, chunk_size: int = 8192) -> None:
     try:
         with requests.get(url, verify=False, stream=True, timeout=30) as resp:
             resp.raise_for_status()
-            # total = int(resp.headers.get("content-length", 0))
-            # downloaded = 0
-            # bar_len = 50
-            # start_time = time.time()
-
-            with open(dest, "wb") as f:
-                for chunk in resp.iter_content(chunk_size=chunk_size):
-                    if chunk:
-                        f.write(chunk)
-                        # downloaded += len(chunk)
-                        # elapsed = time.time() - start_time
-                        # speed = downloaded / elapsed if elapsed > 0 else 0
-
-                        # if total:
-                        #     percent = downloaded / total
-                        #     done = int(bar_len * percent)
-                        #     bar = '█' * done + '-' * (bar_len - done)
-                        #     eta = (total - downloaded) / speed if speed > 0 else 0
-                        #     mins, secs = divmod(int(eta), 60)
-                        #     eta_str = f"{mins:02}:{secs:02}"  # e.g. 01:25
-
-                        #     sys.stdout.write(
-                        #         f"\r[{bar}] {percent*100:5.1f}% "
-                        #         f"{downloaded/1024/1024:6.2f} MB/{total/1024/1024:6.2f} MB "
-                        #         f"{speed/1024/1024:5.2f} MB/s "
-                        #         f"ETA: {eta_str}"
-                        #     )
-                        # else:
-                        #     sys.stdout.write(
-                        #         f"\rDownloaded {downloaded/1024/1024:6.2f} MB "
-                        #         f"at {speed/1024/1024:5.2f} MB/s"
-                        #     )
-
-                        # sys.stdout.flush()
+            # Let urllib3 undo any Content-Encoding so copyfileobj sees the real bytes.
+            resp.raw.decode_content = True
+
+            part = dest.with_name(dest.name + ".part")
+            with open(part, "wb", buffering=chunk_size) as f:
+                shutil.copyfileobj(resp.raw, f, length=chunk_size)
+            os.replace(part, dest)
         print("\nDownload complete.")
     except Exception as e:
         raise RuntimeError(f"Failed to download {url}: {e}") from e
 
 
+def _member_path(target_dir: Path, info: zipfile.ZipInfo) -> Path:
+    """
+    Resolve where ZipFile.extract puts `info` under `target_dir`: drive,
+    absolute and '..' components are dropped and, on Windows, illegal
+    characters are replaced.
+    """
+    arcname = info.filename.replace("/", os.sep)
+    if os.path.altsep:
+        arcname = arcname.replace(os.path.altsep, os.sep)
+    arcname = os.path.splitdrive(arcname)[1]
+    arcname = os.sep.join(
+        p for p in arcname.split(os.sep) if p not in ("", os.curdir, os.pardir)
+    )
+    if os.sep == "\\":
+        arcname = zipfile.ZipFile._sanitize_windows_name(arcname, os.sep)
+    return target_dir / arcname
+
+
 def extract_zip(zip_path: Path, target_dir: Path) -> None:
     """
-    Extract a zipfile to `target_dir`.
+    Extract a zipfile to `target_dir`, which must not exist yet. Members go
+    to a `.part` sibling directory that is renamed onto `target_dir` only
+    once every member is out, so an interrupted extraction never leaves a
+    half-filled `target_dir` behind.
     """
     if not zip_path.exists():
         raise FileNotFoundError(f"Zip file not found: {zip_path}")
-    logging.info(f"Extracting zip: {zip_path} → {target_dir}")
-    target_dir.mkdir(parents=True, exist_ok=True)
+    logging.info("Extracting zip: %s → %s", zip_path, target_dir)
+    part = target_dir.with_name(target_dir.name + ".part")
+    if part.exists():
+        shutil.rmtree(part)
+    part.mkdir(parents=True)
     try:
         with zipfile.ZipFile(zip_path, "r") as zf:
-            zf.extractall(target_dir)
+            zf.extractall(part)
     except zipfile.BadZipFile as e:
         raise RuntimeError(f"Bad zip file {zip_path}: {e}") from e
+    os.replace(part, target_dir)
     logging.info("Extraction complete.")
 
 
+def _extract_members(
+    zip_path: Path, members: List[zipfile.ZipInfo], target_dir: Path
+) -> None:
+    """
+    Extract `members` of `zip_path` through a private ZipFile handle
+    (a single handle is not safe to share between threads).
+    """
+    with zipfile.ZipFile(zip_path, "r") as zf:
+        for info in members:
+            zf.extract(info, target_dir)
+
+
+def extract_zip_parallel(zip_path: Path, target_dir: Path, workers: int = None) -> int:
+    """
+    Extract a zipfile to `target_dir`, spreading its members round-robin
+    over a thread pool. Directories are created up front so workers never
+    race on makedirs. Returns the number of files extracted.
+    """
+    workers = workers or os.cpu_count() or 1
+    with zipfile.ZipFile(zip_path, "r") as zf:
+        infos = zf.infolist()
+
+    files: List[zipfile.ZipInfo] = []
+    dirs = {target_dir}
+    for info in infos:
+        dest = _member_path(target_dir, info)
+        if info.is_dir():
+            dirs.add(dest)
+        else:
+            dirs.add(dest.parent)
+            files.append(info)
+    for d in dirs:
+        d.mkdir(parents=True, exist_ok=True)
+
+    batches = [files[i::workers] for i in range(workers) if files[i::workers]]
+    with ThreadPoolExecutor(max_workers=max(len(batches), 1)) as pool:
+        futures = [
+            pool.submit(_extract_members, zip_path, batch, target_dir)
+            for batch in batches
+        ]
+        for future in futures:
+            future.result()
+
+    return len(files)
+
+
 def run_asset_studio_cli(
     asset_studio_dir: Path,
     unity_data_path: Path,
@@ -164,113 +301,146 @@ def run_asset_studio_cli(
             raise FileNotFoundError(f"Assembly folder not found: {assembly_folder}")
         cmd.extend(["--assembly-folder", str(assembly_folder)])
 
-    logging.info("Running AssetStudioModCLI: " + " ".join(cmd))
+    logging.info("Running AssetStudioModCLI: %s", " ".join(cmd))
     try:
         subprocess.run(cmd, check=True, cwd=asset_studio_dir)
     except subprocess.CalledProcessError as e:
         raise RuntimeError(
             f"AssetStudioModCLI failed (exit code {e.returncode})"
         ) from e
-    logging.info(f"AssetStudio CLI finished extracting {asset_type}.")
+    logging.info("AssetStudio CLI finished extracting %s.", asset_type)
 
 
 def sanitize_text(text: str) -> str:
     """
     Replace CRLF / CR / LF with literal '\n' and strip.
     """
-    return text.replace("\r\n", "\\n").replace("\r", "\\n").replace("\n", "\\n").strip()
+    if "\n" in text or "\r" in text:
+        text = _NEWLINE_RE.sub(r"\\n", text)
+    return text.strip()
 
 
-def parse_i2_asset_file(
-    file_path: Path, filter_patterns: List[re.Pattern] = None
-) -> Tuple[List[Tuple[str, List[str]]], List[str]]:
+def _compile_key_filter(patterns: List[re.Pattern]) -> Callable[[str], object]:
     """
-    Parse a single I2 Languages .dat file.
-    Returns:
-      - sorted list of (key, [fields...])
-      - list of language names
+    Fold `patterns` into a single alternation so each key costs one match()
+    call. Falls back to testing them one by one when they cannot be merged
+    (mixed flags, clashing group names) or when any of them has groups, whose
+    numbers and backreferences would shift inside the alternation.
     """
-    if not file_path.exists():
-        raise FileNotFoundError(f"I2 .dat file not found: {file_path}")
+    flags = {p.flags for p in patterns}
+    if len(flags) == 1 and not any(p.groups for p in patterns):
+        try:
+            combined = "|".join(f"(?:{p.pattern})" for p in patterns)
+            return re.compile(combined, flags.pop()).match
+        except re.error:
+            pass
+    return lambda key: any(p.match(key) for p in patterns)
 
-    data = file_path.read_bytes()
+
+def _parse_i2_records(
+    data: memoryview, filter_patterns: List[re.Pattern] = None
+) -> List[Tuple[str, List[str]]]:
+    """
+    Walk an in-memory I2 Languages buffer and return its (key, [fields...])
+    records in file order. Every length prefix and payload is padded to a
+    4-byte boundary.
+    """
+    # Bound locally so the loop does LOAD_FAST instead of global/attribute lookups.
+    unpack = _U32.unpack_from
+    sanitize = sanitize_text
+    n = len(data)
+    key_filter = _compile_key_filter(filter_patterns) if filter_patterns else None
     records: List[Tuple[str, List[str]]] = []
     pos = 60
 
-    while pos < len(data):
+    while pos < n:
 
-        if pos % 4:
-            pos += 4 - (pos % 4)
-        if pos + 4 > len(data):
+        pos = (pos + 3) & ~3
+        if pos + 4 > n:
             break
 
-        key_len = int.from_bytes(data[pos : pos + 4], "little")
+        key_len = unpack(data, pos)[0]
         pos += 4
 
         if key_len == 0:
 
-            while (
-                pos < len(data) and int.from_bytes(data[pos : pos + 4], "little") == 0
-            ):
+            while pos + 4 <= n and unpack(data, pos)[0] == 0:
                 pos += 4
-            if pos >= len(data) - 4:
+            if pos >= n - 4:
                 break
-            key_len = int.from_bytes(data[pos : pos + 4], "little")
+            key_len = unpack(data, pos)[0]
             pos += 4
             if key_len == 0:
                 break
 
         key_bytes = data[pos : pos + key_len]
         try:
-            key = key_bytes.decode("utf-8", errors="ignore").strip()
+            key = str(key_bytes, "utf-8", "ignore").strip()
         except UnicodeDecodeError:
-            key = key_bytes.decode("latin-1", errors="ignore").strip()
-        pos += key_len
+            key = str(key_bytes, "latin-1", "ignore").strip()
+        pos = (pos + key_len + 3) & ~3
 
-        if pos % 4:
-            pos += 4 - (pos % 4)
-
-        if pos + 4 > len(data):
+        if pos + 4 > n:
             break
-        start_count = int.from_bytes(data[pos : pos + 4], "little")
+        fields_count = unpack(data, pos)[0]
         pos += 4
 
-        if start_count == 0:
-            if pos + 4 > len(data):
+        if fields_count == 0:
+            if pos + 4 > n:
                 break
-            fields_count = int.from_bytes(data[pos : pos + 4], "little")
+            fields_count = unpack(data, pos)[0]
             pos += 4
-        else:
-            fields_count = start_count
 
         fields: List[str] = []
         for _ in range(fields_count):
-            if pos + 4 > len(data):
+            if pos + 4 > n:
                 break
-            field_len = int.from_bytes(data[pos : pos + 4], "little")
+            field_len = unpack(data, pos)[0]
             pos += 4
 
             if field_len > 0:
                 raw = data[pos : pos + field_len]
                 try:
-                    text = raw.decode("utf-8")
+                    text = str(raw, "utf-8")
                 except UnicodeDecodeError:
-                    text = raw.decode("latin-1", errors="ignore")
+                    text = str(raw, "latin-1", "ignore")
+                fields.append(sanitize(text))
             else:
-                text = ""
-            fields.append(sanitize_text(text))
-            pos += field_len
+                fields.append("")
+            pos = (pos + field_len + 3) & ~3
 
-            if pos % 4:
-                pos += 4 - (pos % 4)
-
-        if pos + 4 <= len(data):
+        if pos + 4 <= n:
             pos += 4
 
-        if not filter_patterns or not any(p.match(key) for p in filter_patterns):
+        if key_filter is None or not key_filter(key):
             records.append((key, fields))
 
-    records.sort(key=lambda r: r[0])
+    return records
+
+
+def parse_i2_asset_file(
+    file_path: Path, filter_patterns: List[re.Pattern] = None
+) -> Tuple[List[Tuple[str, List[str]]], List[str]]:
+    """
+    Parse a single I2 Languages .dat file.
+    Returns:
+      - sorted list of (key, [fields...])
+      - list of language names
+    """
+    if not file_path.exists():
+        raise FileNotFoundError(f"I2 .dat file not found: {file_path}")
+
+    # Map the file instead of reading it into the heap; the parser only ever
+    # decodes small slices of it. mmap refuses empty files, which hold no
+    # records anyway.
+    with open(file_path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return [], LANGUAGES
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            with memoryview(mm) as data:
+                records = _parse_i2_records(data, filter_patterns)
+    # Sort on the key alone so duplicate keys keep their file order.
+    records.sort(key=itemgetter(0))
     return records, LANGUAGES
 
 
@@ -279,7 +449,7 @@ def get_latest_apk_info() -> Tuple[str, str]:
     Fetch BASE_URL, search for APK_REGEX. Return (version, download_link).
     Raises RuntimeError if not found.
     """
-    logging.info(f"Fetching website: {BASE_URL}")
+    logging.info("Fetching website: %s", BASE_URL)
     try:
         resp = requests.get(BASE_URL, timeout=15)
         resp.raise_for_status()
@@ -291,35 +461,58 @@ def get_latest_apk_info() -> Tuple[str, str]:
         raise RuntimeError("Could not find Soul Knight APK link on page.")
     version = match.group(1)
     link = match.group(0)
-    logging.info(f"Found version: {version}")
+    logging.info("Found version: %s", version)
     return version, link
 
 
+def _apk_fingerprint(apk_path: Path) -> Dict[str, int]:
+    """
+    Identify an APK by size and mtime; a stat() is enough to notice a
+    re-download without reading hundreds of MB.
+    """
+    st = apk_path.stat()
+    return {"apk_size": st.st_size, "apk_mtime_ns": st.st_mtime_ns}
+
+
 def ensure_apk_extracted(version: str, link: str) -> Path:
     """
     Download the APK if needed, then extract it into data/sk.
+    Extraction is skipped when the folder's manifest records the same APK
+    size and mtime; a folder without a matching manifest is treated as
+    partial and re-extracted.
     Returns the path to the extracted folder (sk_extracted_path).
     """
     versioned_apk_file = DATA_DIR / f"sk-{version}.apk"
     sk_extracted_path = DATA_DIR / f"sk-{version}"
+    manifest_path = DATA_DIR / f"sk-{version}.manifest.json"
 
     if not versioned_apk_file.exists():
         download_file(link, versioned_apk_file)
     else:
-        logging.info(f"APK already exists: {versioned_apk_file}")
+        logging.info("APK already exists: %s", versioned_apk_file)
 
-    if not sk_extracted_path.exists():
+    fingerprint = _apk_fingerprint(versioned_apk_file)
+    if sk_extracted_path.exists() and manifest_path.exists():
         try:
-            sk_extracted_path.mkdir(parents=True, exist_ok=False)
-            with zipfile.ZipFile(versioned_apk_file, "r") as zf:
-                zf.extractall(sk_extracted_path)
-        except zipfile.BadZipFile as e:
-            raise RuntimeError(f"Corrupted APK zip: {versioned_apk_file}") from e
-        except Exception as e:
-            raise RuntimeError(f"Failed extracting APK: {e}") from e
-        logging.info(f"APK extracted to: {sk_extracted_path}")
-    else:
-        logging.info(f"APK already extracted at: {sk_extracted_path}")
+            manifest = _load_json(manifest_path)
+        except (OSError, ValueError):
+            manifest = {}
+        if all(manifest.get(k) == v for k, v in fingerprint.items()):
+            logging.info("APK already extracted at: %s", sk_extracted_path)
+            return sk_extracted_path
+
+    if sk_extracted_path.exists():
+        logging.info("Discarding stale APK extraction: %s", sk_extracted_path)
+        shutil.rmtree(sk_extracted_path)
+    try:
+        sk_extracted_path.mkdir(parents=True, exist_ok=False)
+        file_count = extract_zip_parallel(versioned_apk_file, sk_extracted_path)
+    except zipfile.BadZipFile as e:
+        raise RuntimeError(f"Corrupted APK zip: {versioned_apk_file}") from e
+    except Exception as e:
+        raise RuntimeError(f"Failed extracting APK: {e}") from e
+    _dump_json({**fingerprint, "file_count": file_count}, manifest_path)
+    logging.info("APK extracted to: %s", sk_extracted_path)
 
     return sk_extracted_path
 
@@ -332,16 +525,34 @@ def ensure_asset_studio() -> Path:
     if not ASSET_STUDIO_ZIP.exists():
         download_file(ASSET_STUDIO_CLI_URL, ASSET_STUDIO_ZIP)
     else:
-        logging.info(f"AssetStudio ZIP already present: {ASSET_STUDIO_ZIP}")
+        logging.info("AssetStudio ZIP already present: %s", ASSET_STUDIO_ZIP)
 
     if not ASSET_STUDIO_DIR.exists():
         extract_zip(ASSET_STUDIO_ZIP, ASSET_STUDIO_DIR)
     else:
-        logging.info(f"AssetStudio already extracted at: {ASSET_STUDIO_DIR}")
+        logging.info("AssetStudio already extracted at: %s", ASSET_STUDIO_DIR)
 
     return ASSET_STUDIO_DIR
 
 
+def _scan_export_dir(pattern: str, root: str = None) -> Iterator[os.DirEntry]:
+    """
+    Yield files under EXPORT_DIR (recursively) whose name matches `pattern`,
+    like EXPORT_DIR.rglob(pattern) but handing back os.DirEntry objects
+    instead of building a Path for every entry visited.
+    """
+    with os.scandir(root or EXPORT_DIR) as it:
+        entries = list(it)
+    subdirs = []
+    for entry in entries:
+        if entry.is_dir(follow_symlinks=False):
+            subdirs.append(entry.path)
+        elif fnmatch.fnmatch(entry.name, pattern):
+            yield entry
+    for subdir in subdirs:
+        yield from _scan_export_dir(pattern, subdir)
+
+
 def run_asset_extractions(sk_extracted_path: Path) -> None:
     """
     1) Extract I2Languages .dat (monobehaviour/raw)
@@ -374,20 +585,20 @@ def run_asset_extractions(sk_extracted_path: Path) -> None:
     )
 
     removed_any = False
-    for dat_file in EXPORT_DIR.rglob("I2Languages*.dat"):
+    for dat_file in _scan_export_dir("I2Languages*.dat"):
         try:
             size = dat_file.stat().st_size
         except OSError as e:
-            logging.warning(f"Could not stat file {dat_file}: {e}")
+            logging.warning("Could not stat file %s: %s", dat_file.path, e)
             continue
 
         if size < 2_000_000:
             try:
-                dat_file.unlink()
-                logging.info(f"Removed SMALL I2 file: {dat_file.name} ({size} bytes)")
+                os.unlink(dat_file.path)
+                logging.info("Removed SMALL I2 file: %s (%s bytes)", dat_file.name, size)
                 removed_any = True
             except Exception as e:
-                logging.warning(f"Failed to remove {dat_file}: {e}")
+                logging.warning("Failed to remove %s: %s", dat_file.path, e)
 
     if not removed_any:
         logging.info("No SMALL I2Languages*.dat files were found to remove.")
@@ -407,83 +618,135 @@ def find_valid_i2_dat() -> Path:
     Find the first I2Languages*.dat in EXPORT_DIR with size ≥ 2 MB.
     Raises FileNotFoundError if none found.
     """
-    for dat_file in EXPORT_DIR.rglob("I2Languages*.dat"):
+    for dat_file in _scan_export_dir("I2Languages*.dat"):
         try:
             size = dat_file.stat().st_size
         except OSError:
             continue
         if size >= 2_000_000:
-            logging.info(f"Found valid I2 dat: {dat_file.name} ({size} bytes)")
-            return dat_file
+            logging.info("Found valid I2 dat: %s (%s bytes)", dat_file.name, size)
+            return Path(dat_file.path)
     raise FileNotFoundError(
         "No valid (≥2 MB) I2Languages .dat file found under export/."
     )
 
 
+def find_weapon_info() -> Path:
+    """
+    Find the WeaponInfo.txt export (name matched case-insensitively) directly
+    under EXPORT_DIR. Raises FileNotFoundError if none found.
+    """
+    # AssetStudio normally writes the canonical name; one stat() beats listing
+    # the whole export directory.
+    candidate = EXPORT_DIR / "WeaponInfo.txt"
+    if candidate.is_file():
+        return candidate
+    # scandir hands back names without building a Path or stat()ing each entry.
+    with os.scandir(EXPORT_DIR) as it:
+        for entry in it:
+            if entry.name.lower().endswith("weaponinfo.txt"):
+                return Path(entry.path)
+    raise FileNotFoundError("WeaponInfo.txt not found under export/")
+
+
 def write_i2_csv(version: str, records: List[Tuple[str, List[str]]]) -> Path:
     """
     Given (key, [fields...]) records, write them into I2language_{version}.csv
     under the script folder. Returns the CSV path.
     """
     csv_path = SCRIPT_DIR / f"I2language_{version}.csv"
-    logging.info(f"Writing CSV: {csv_path}")
+    logging.info("Writing CSV: %s", csv_path)
     try:
-        with open(csv_path, "w", encoding="utf-8", newline="") as f:
+        with open(
+            csv_path, "w", encoding="utf-8", newline="", buffering=COPY_BUFFER_SIZE
+        ) as f:
             writer = csv.writer(f)
             writer.writerow(["id"] + LANGUAGES)
-            for key, fields in records:
-                writer.writerow([key] + fields)
+            writer.writerows((key, *fields) for key, fields in records)
     except Exception as e:
         raise RuntimeError(f"Failed writing CSV {csv_path}: {e}") from e
     return csv_path
 
 
-def load_language_map(csv_path: Path, language: str = "English") -> Dict[str, str]:
+def _resolve_aliases(raw_map: Dict[str, str]) -> Dict[str, str]:
     """
-    Load the CSV and resolve aliases like `{boss18}` → boss18 → final English string.
-    Returns: dict of ID → English string (fully resolved)
+    Resolve aliases like `{boss18}` → boss18 → final string across `raw_map`.
+    Returns: dict of ID → string (fully resolved)
     """
-    raw_map: Dict[str, str] = {}
     resolved_map: Dict[str, str] = {}
 
+    # Resolve everything, following alias chains iteratively
+    for key in raw_map:
+        if key in resolved_map:
+            continue
+        chain: List[str] = []
+        cur = key
+        while True:
+            if cur in resolved_map:
+                val = resolved_map[cur]
+                break
+            val = raw_map.get(cur, "")
+            if not (val.startswith("{") and val.endswith("}")):
+                resolved_map[cur] = val
+                break
+            chain.append(cur)
+            cur = val[1:-1]
+            if cur in chain:
+                val = f"[Cyclic alias: {cur}]"
+                break
+        for k in reversed(chain):
+            resolved_map[k] = val
+
+    return resolved_map
+
+
+def load_language_maps(
+    csv_path: Path, languages: List[str]
+) -> Dict[str, Dict[str, str]]:
+    """
+    Read the CSV once and return a fully resolved ID → string map for each
+    of `languages`, keyed by language name.
+    """
+    raw_maps: Dict[str, Dict[str, str]] = {language: {} for language in languages}
+
+    # Plain csv.reader plus column indices: only the columns we need are
+    # touched, instead of DictReader building a dict for every row.
     with open(csv_path, "r", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
+        reader = csv.reader(f)
+        header = next(reader, [])
+        id_col = header.index("id")
+        # A missing language column reads as "" for every row.
+        columns = [
+            (raw_maps[lang], header.index(lang) if lang in header else len(header))
+            for lang in languages
+        ]
         for row in reader:
-            rid = row["id"].strip()
-            eng = row.get(language, "").strip()
-            raw_map[rid] = eng
+            if not row:
+                continue
+            rid = row[id_col].strip()
+            for raw_map, lang_col in columns:
+                raw_map[rid] = row[lang_col].strip() if lang_col < len(row) else ""
 
-    def resolve(key: str, visited=None) -> str:
-        if key in resolved_map:
-            return resolved_map[key]
-        if visited is None:
-            visited = set()
-        if key in visited:
-            return f"[Cyclic alias: {key}]"
-        visited.add(key)
-
-        val = raw_map.get(key, "")
-        if val.startswith("{") and val.endswith("}"):
-            ref = val[1:-1]
-            resolved = resolve(ref, visited)
-            resolved_map[key] = resolved
-            return resolved
-        else:
-            resolved_map[key] = val
-            return val
+    return {language: _resolve_aliases(raw_maps[language]) for language in languages}
 
-    # Resolve everything
-    for k in raw_map:
-        resolve(k)
 
-    return resolved_map
+def load_language_map(csv_path: Path, language: str = "English") -> Dict[str, str]:
+    """
+    Load the CSV and resolve aliases like `{boss18}` → boss18 → final English string.
+    Returns: dict of ID → English string (fully resolved)
+    """
+    return load_language_maps(csv_path, [language])[language]
 
 
-def build_dictionaries(csv_path: Path) -> Dict[str, Dict]:
+def _classify_langmap(
+    lang_map: Dict[str, str]
+) -> Tuple[Dict[str, Dict], Dict[str, Dict], Dict[str, Any]]:
     """
-    Read resolved language map and build all lookup dictionaries.
+    Sort a resolved language map into the build_dictionaries() lookups, the
+    export_needed_data_from_langmap() categories and the
+    export_weapon_evo_data() structure in a single pass.
+    Returns (lang_maps, needed_data, weapon_evo).
     """
-    lang_map = load_language_map(csv_path)
     weapons_map = {}
     buff_names = {}
     buff_infos = {}
@@ -495,17 +758,68 @@ def build_dictionaries(csv_path: Path) -> Dict[str, Dict]:
     pets = {}
     characters: Dict[str, Dict[str, str]] = {}
 
+    needed_skins: Dict[str, Dict[str, str]] = defaultdict(dict)
+    needed_data = {
+        "skin": needed_skins,              # c1: {c1_skin0: name, ...}
+        "pet": {},                         # p0: name
+        "material": {},                    # material_id: name
+        "character_skill": {},             # Character1_skill_1_name: name
+    }
+
+    weapon_skin_map: Dict[str, List[str]] = defaultdict(list)
+    upgradable_weapons = set()
+
+    # Keys stored verbatim under their prefix's dictionary.
+    simple_targets = {
+        "Buff_name_": buff_names,
+        "Buff_info_": buff_infos,
+        "material_": materials,
+    }
+
+    # Local aliases for the per-key calls below.
+    match_prefix = _LANG_PREFIX_RE.match
+    match_needed = _NEEDED_DATA_RE.fullmatch
+    get_simple_target = simple_targets.get
+
     for rid, eng in lang_map.items():
-        if rid.startswith("weapon/"):
+        m = match_prefix(rid)
+        if not m:
+            continue
+        prefix = m.group()
+
+        # Every needed-data key starts with one of these prefixes.
+        if prefix == "Character" or prefix == "Pet_name_" or prefix == "material_":
+            n = match_needed(rid)
+            if n:
+                kind = n.lastgroup
+                if kind == "skin":
+                    char_index, skin_index = n.group("char_index", "skin_index")
+                    needed_skins[f"c{char_index}"][f"c{char_index}_skin{skin_index}"] = eng
+                elif kind == "pet":
+                    needed_data["pet"][n.group("pet_id")] = eng
+                else:
+                    # Materials and character skills are keyed by the full ID
+                    needed_data[kind][rid] = eng
+
+        target = get_simple_target(prefix)
+        if target is not None:
+            target[rid] = eng
+
+        elif prefix == "weapon/":
             weapons_map[rid.replace("weapon/", "")] = eng
 
-        elif rid.startswith("Buff_name_"):
-            buff_names[rid] = eng
-        elif rid.startswith("Buff_info_"):
-            buff_infos[rid] = eng
+        elif prefix == "weapon_":
+            m = _WEAPON_SKIN_RE.match(rid)
+            if m:
+                weapon_skin_map[m.group(1)].append(rid)
+
+        elif prefix == "desc_evolution_":
+            m = _WEAPON_UPGRADE_RE.match(rid)
+            if m:
+                upgradable_weapons.add(m.group(1))
 
-        elif rid.startswith("task/"):
-            m = re.match(r"task/([^_]+)(_title|_desc)?", rid)
+        elif prefix == "task/":
+            m = _TASK_RE.match(rid)
             if not m:
                 continue
             cid, suffix = m.groups()
@@ -516,26 +830,29 @@ def build_dictionaries(csv_path: Path) -> Dict[str, Dict]:
             else:
                 challenge_names[cid] = eng
 
-        elif rid.startswith("material_"):
-            materials[rid] = eng
+        elif prefix == "plant_":
+            if "/" not in rid:
+                plant_ids[rid] = eng
 
-        elif rid.startswith("plant_") and "/" not in rid:
-            plant_ids[rid] = eng
-
-        elif (
-            rid.startswith("Pet_name_")
-            and not rid.endswith("_des")
-            and not rid.endswith("_lock")
-        ):
-            pets[rid] = eng
+        elif prefix == "Pet_name_":
+            if not rid.endswith("_des") and not rid.endswith("_lock"):
+                pets[rid] = eng
 
         else:
-            m = re.match(r"Character(\d+)_name_skin(\d+)", rid)
+            m = _CHAR_SKIN_RE.match(rid)
             if m:
                 char_index, skin_index = m.groups()
                 characters.setdefault(char_index, {})[skin_index] = eng
 
-    return {
+    # Convert defaultdict to dict for JSON
+    needed_data["skin"] = dict(needed_skins)
+
+    weapon_evo = {
+        "upgradable_weapon": sorted(upgradable_weapons),
+        "weapon_skin": {k: sorted(v) for k, v in weapon_skin_map.items()},
+    }
+
+    lang_maps = {
         "weapons": weapons_map,
         "buff_names": buff_names,
         "buff_infos": buff_infos,
@@ -547,6 +864,15 @@ def build_dictionaries(csv_path: Path) -> Dict[str, Dict]:
         "pets": pets,
         "characters": characters,
     }
+    return lang_maps, needed_data, weapon_evo
+
+
+def build_dictionaries(csv_path: Path) -> Dict[str, Dict]:
+    """
+    Read resolved language map and build all lookup dictionaries.
+    """
+    lang_maps, _, _ = _classify_langmap(load_language_map(csv_path))
+    return lang_maps
 
 
 def write_master_txt(
@@ -559,13 +885,12 @@ def write_master_txt(
     Returns path to the TXT.
     """
     txt_path = SCRIPT_DIR / f"Allinfo_{version}.txt"
-    logging.info(f"Writing master TXT: {txt_path}")
+    logging.info("Writing master TXT: %s", txt_path)
     if not weapon_json_path.exists():
         raise FileNotFoundError(f"WeaponInfo JSON not found: {weapon_json_path}")
 
     try:
-        with open(weapon_json_path, "r", encoding="utf-8") as f:
-            data = json.load(f)
+        data = _load_json(weapon_json_path)
     except json.JSONDecodeError as e:
         raise RuntimeError(f"Invalid JSON in {weapon_json_path}: {e}") from e
     except Exception as e:
@@ -586,121 +911,133 @@ def write_master_txt(
     characters = lang_maps["characters"]
     max_skin_ids = {}
     try:
-        with open(txt_path, "w", encoding="utf-8") as out:
-
-            out.write(
-                "██     ██ ███████  █████  ██████   ██████  ███    ██\n"
-                "██     ██ ██      ██   ██ ██   ██ ██    ██ ████   ██\n"
-                "██  █  ██ █████   ███████ ██████  ██    ██ ██ ██  ██\n"
-                "██ ███ ██ ██      ██   ██ ██      ██    ██ ██  ██ ██\n"
-                " ███ ███  ███████ ██   ██ ██       ██████  ██   ████\n\n"
-            )
-            for w in weapons_sorted:
-                name_key = w.get("name", "")
-                english_name = weapons_map.get(name_key, "[Name Not Found]")
-                out.write(f"{name_key}\n")
-                out.write(f"    Name      : {english_name}\n")
-                out.write(f"    Forgeable : {w.get('forgeable', False)}\n")
-                out.write(f"    Is melee  : {w.get('isMelle', False)}\n")
-                out.write(f"    Rarity    : {w.get('level', '')}\n")
-                out.write(f"    Type      : {w.get('type', '')}\n\n")
-
-            out.write(
-                " ██████ ██   ██  █████  ██████   █████   ██████ ████████ ███████ ██████\n"
-                "██      ██   ██ ██   ██ ██   ██ ██   ██ ██         ██    ██      ██   ██\n"
-                "██      ███████ ███████ ██████  ███████ ██         ██    █████   ██████\n"
-                "██      ██   ██ ██   ██ ██   ██ ██   ██ ██         ██    ██      ██   ██\n"
-                " ██████ ██   ██ ██   ██ ██   ██ ██   ██  ██████    ██    ███████ ██   ██\n\n"
-            )
-            for char_index in sorted(characters.keys()):
-                skins = characters[char_index]
-                default_name = skins.get("0", "[Unknown]")
-                out.write(f"c{char_index} = {default_name}\n")
-                max_skin_id = max(int(sid) for sid in skins.keys())
-                max_skin_ids[f"c{char_index}"] = max_skin_id
-                for skin_index in sorted(skins.keys(), key=lambda x: int(x)):
-                    skin_name = skins[skin_index]
-                    out.write(f"    c{char_index}_skin{skin_index} = {skin_name}\n")
-                out.write("\n")
-
-            out.write(
-                "██████  ███████ ████████\n"
-                "██   ██ ██         ██   \n"
-                "██████  █████      ██   \n"
-                "██      ██         ██   \n"
-                "██      ███████    ██   \n\n"
+        # Assemble the whole report in memory and hand it to the file in one write.
+        parts: List[str] = []
+        parts.append(
+            "██     ██ ███████  █████  ██████   ██████  ███    ██\n"
+            "██     ██ ██      ██   ██ ██   ██ ██    ██ ████   ██\n"
+            "██  █  ██ █████   ███████ ██████  ██    ██ ██ ██  ██\n"
+            "██ ███ ██ ██      ██   ██ ██      ██    ██ ██  ██ ██\n"
+            " ███ ███  ███████ ██   ██ ██       ██████  ██   ████\n\n"
+        )
+        for w in weapons_sorted:
+            name_key = w.get("name", "")
+            english_name = weapons_map.get(name_key, "[Name Not Found]")
+            parts.append(
+                f"{name_key}\n"
+                f"    Name      : {english_name}\n"
+                f"    Forgeable : {w.get('forgeable', False)}\n"
+                f"    Is melee  : {w.get('isMelle', False)}\n"
+                f"    Rarity    : {w.get('level', '')}\n"
+                f"    Type      : {w.get('type', '')}\n\n"
             )
-            for pet_id, pet_name in sorted(pets.items(), key=lambda kv: kv[0]):
-                out.write(f"{pet_id.removeprefix('Pet_name_')}\n")
-                out.write(f"    Display name : {pet_name}\n\n")
-
-            out.write(
-                "██████  ██    ██ ███████ ███████ \n"
-                "██   ██ ██    ██ ██      ██      \n"
-                "██████  ██    ██ █████   █████   \n"
-                "██   ██ ██    ██ ██      ██      \n"
-                "██████   ██████  ██      ██      \n\n"
+
+        parts.append(
+            " ██████ ██   ██  █████  ██████   █████   ██████ ████████ ███████ ██████\n"
+            "██      ██   ██ ██   ██ ██   ██ ██   ██ ██         ██    ██      ██   ██\n"
+            "██      ███████ ███████ ██████  ███████ ██         ██    █████   ██████\n"
+            "██      ██   ██ ██   ██ ██   ██ ██   ██ ██         ██    ██      ██   ██\n"
+            " ██████ ██   ██ ██   ██ ██   ██ ██   ██  ██████    ██    ███████ ██   ██\n\n"
+        )
+        # Character and skin indices are digit strings; sort them numerically.
+        for _, char_index in sorted((int(k), k) for k in characters):
+            skins = characters[char_index]
+            default_name = skins.get("0", "[Unknown]")
+            parts.append(f"c{char_index} = {default_name}\n")
+            skin_items = sorted(
+                (int(sid), sid, name) for sid, name in skins.items()
             )
-            buff_ids = set()
-            buff_ids.update(k.replace("Buff_name_", "") for k in buff_names.keys())
-            buff_ids.update(k.replace("Buff_info_", "") for k in buff_infos.keys())
-            for bid in sorted(buff_ids):
-                name_key = f"Buff_name_{bid}"
-                info_key = f"Buff_info_{bid}"
-                bname = buff_names.get(name_key, "[Name Not Found]")
-                binfo = buff_infos.get(info_key, "[Description Not Found]")
-                out.write(f"{bid}\n")
-                out.write(f"    Name        : {bname}\n")
-                out.write(f"    Description : {binfo}\n\n")
-
-            out.write(
-                " ██████ ██   ██  █████  ██       █████  ███    ██  ██████  ███████ \n"
-                "██      ██   ██ ██   ██ ██      ██   ██ ████   ██ ██       ██      \n"
-                "██      ███████ ███████ ██      ███████ ██ ██  ██ ██   ███ █████   \n"
-                "██      ██   ██ ██   ██ ██      ██   ██ ██  ██ ██ ██    ██ ██      \n"
-                " ██████ ██   ██ ██   ██ ███████ ██   ██ ██   ████  ██████  ███████ \n\n"
+            max_skin_ids[f"c{char_index}"] = skin_items[-1][0]
+            for _, skin_index, skin_name in skin_items:
+                parts.append(f"    c{char_index}_skin{skin_index} = {skin_name}\n")
+            parts.append("\n")
+
+        parts.append(
+            "██████  ███████ ████████\n"
+            "██   ██ ██         ██   \n"
+            "██████  █████      ██   \n"
+            "██      ██         ██   \n"
+            "██      ███████    ██   \n\n"
+        )
+        for pet_id, pet_name in sorted(pets.items(), key=lambda kv: kv[0]):
+            parts.append(
+                f"{pet_id.removeprefix('Pet_name_')}\n"
+                f"    Display name : {pet_name}\n\n"
             )
-            challenge_ids = set()
-            challenge_ids.update(challenge_names.keys())
-            challenge_ids.update(challenge_titles.keys())
-            challenge_ids.update(challenge_descs.keys())
-
-            for cid in sorted(
-                challenge_ids, key=lambda x: int(x) if x.isdigit() else x
-            ):
-                name = challenge_names.get(cid, "[Name Not Found]")
-                title = challenge_titles.get(cid, "[Title Not Found]")
-                desc = challenge_descs.get(cid, "[Description Not Found]")
-                out.write(f"{cid.removeprefix('name/')}\n")
-                out.write(f"    Name        : {name}\n")
-                out.write(f"    Title       : {title}\n")
-                out.write(f"    Description : {desc}\n\n")
-
-            out.write(
-                "███    ███  █████  ████████ ███████ ██████  ██  █████  ██      \n"
-                "████  ████ ██   ██    ██    ██      ██   ██ ██ ██   ██ ██      \n"
-                "██ ████ ██ ███████    ██    █████   ██████  ██ ███████ ██      \n"
-                "██  ██  ██ ██   ██    ██    ██      ██   ██ ██ ██   ██ ██      \n"
-                "██      ██ ██   ██    ██    ███████ ██   ██ ██ ██   ██ ███████ \n\n"
+
+        parts.append(
+            "██████  ██    ██ ███████ ███████ \n"
+            "██   ██ ██    ██ ██      ██      \n"
+            "██████  ██    ██ █████   █████   \n"
+            "██   ██ ██    ██ ██      ██      \n"
+            "██████   ██████  ██      ██      \n\n"
+        )
+        buff_ids = set()
+        buff_ids.update(k.replace("Buff_name_", "") for k in buff_names.keys())
+        buff_ids.update(k.replace("Buff_info_", "") for k in buff_infos.keys())
+        for bid in sorted(buff_ids):
+            name_key = f"Buff_name_{bid}"
+            info_key = f"Buff_info_{bid}"
+            bname = buff_names.get(name_key, "[Name Not Found]")
+            binfo = buff_infos.get(info_key, "[Description Not Found]")
+            parts.append(
+                f"{bid}\n"
+                f"    Name        : {bname}\n"
+                f"    Description : {binfo}\n\n"
             )
-            for mid, mname in sorted(materials.items(), key=lambda kv: kv[0]):
-                out.write(f"{mid}\n")
-                out.write(f"    Display name : {mname}\n\n")
-
-            out.write(
-                "██████  ██       █████  ███    ██ ████████ \n"
-                "██   ██ ██      ██   ██ ████   ██    ██    \n"
-                "██████  ██      ███████ ██ ██  ██    ██    \n"
-                "██      ██      ██   ██ ██  ██ ██    ██    \n"
-                "██      ███████ ██   ██ ██   ████    ██    \n\n"
+
+        parts.append(
+            " ██████ ██   ██  █████  ██       █████  ███    ██  ██████  ███████ \n"
+            "██      ██   ██ ██   ██ ██      ██   ██ ████   ██ ██       ██      \n"
+            "██      ███████ ███████ ██      ███████ ██ ██  ██ ██   ███ █████   \n"
+            "██      ██   ██ ██   ██ ██      ██   ██ ██  ██ ██ ██    ██ ██      \n"
+            " ██████ ██   ██ ██   ██ ███████ ██   ██ ██   ████  ██████  ███████ \n\n"
+        )
+        challenge_ids = set()
+        challenge_ids.update(challenge_names.keys())
+        challenge_ids.update(challenge_titles.keys())
+        challenge_ids.update(challenge_descs.keys())
+
+        # Numeric IDs first in numeric order, then the rest alphabetically.
+        for cid in sorted(
+            challenge_ids, key=lambda x: (0, int(x), x) if x.isdigit() else (1, 0, x)
+        ):
+            name = challenge_names.get(cid, "[Name Not Found]")
+            title = challenge_titles.get(cid, "[Title Not Found]")
+            desc = challenge_descs.get(cid, "[Description Not Found]")
+            parts.append(
+                f"{cid.removeprefix('name/')}\n"
+                f"    Name        : {name}\n"
+                f"    Title       : {title}\n"
+                f"    Description : {desc}\n\n"
             )
-            for pid, pname in sorted(plants.items(), key=lambda kv: kv[0]):
-                out.write(f"{pid}\n")
-                out.write(f"    Display name : {pname}\n\n")
-            skin_id_json_path = SCRIPT_DIR / "highest_skin_ids.json"
-            with open(skin_id_json_path, "w", encoding="utf-8") as f:
-                json.dump(max_skin_ids, f, indent=2, sort_keys=True)
-            logging.info(f"Exported max skin IDs to {skin_id_json_path}")
+
+        parts.append(
+            "███    ███  █████  ████████ ███████ ██████  ██  █████  ██      \n"
+            "████  ████ ██   ██    ██    ██      ██   ██ ██ ██   ██ ██      \n"
+            "██ ████ ██ ███████    ██    █████   ██████  ██ ███████ ██      \n"
+            "██  ██  ██ ██   ██    ██    ██      ██   ██ ██ ██   ██ ██      \n"
+            "██      ██ ██   ██    ██    ███████ ██   ██ ██ ██   ██ ███████ \n\n"
+        )
+        for mid, mname in sorted(materials.items(), key=lambda kv: kv[0]):
+            parts.append(f"{mid}\n    Display name : {mname}\n\n")
+
+        parts.append(
+            "██████  ██       █████  ███    ██ ████████ \n"
+            "██   ██ ██      ██   ██ ████   ██    ██    \n"
+            "██████  ██      ███████ ██ ██  ██    ██    \n"
+            "██      ██      ██   ██ ██  ██ ██    ██    \n"
+            "██      ███████ ██   ██ ██   ████    ██    \n\n"
+        )
+        for pid, pname in sorted(plants.items(), key=lambda kv: kv[0]):
+            parts.append(f"{pid}\n    Display name : {pname}\n\n")
+
+        with open(txt_path, "w", encoding="utf-8") as out:
+            out.write("".join(parts))
+
+        skin_id_json_path = SCRIPT_DIR / "highest_skin_ids.json"
+        _dump_json(max_skin_ids, skin_id_json_path)
+        logging.info("Exported max skin IDs to %s", skin_id_json_path)
     except Exception as e:
         raise RuntimeError(f"Failed writing master TXT {txt_path}: {e}") from e
 
@@ -716,232 +1053,218 @@ def export_filtered_weapons_from_info(
     Export only the weapons listed in WeaponInfo.txt, filtered by exclusion patterns,
     and write them as {weapon_id: english_name} JSON.
     """
-    # Read WeaponInfo JSON
+    # Read WeaponInfo JSON, keeping only its weapon list
     try:
-        with open(weapon_info_path, "r", encoding="utf-8") as f:
-            info_data = json.load(f)
+        weapon_list = _load_json(weapon_info_path).get("weapons", [])
     except Exception as e:
         raise RuntimeError(f"Failed reading WeaponInfo.txt: {e}") from e
 
-    # Get weapon IDs from WeaponInfo
-    weapon_list = info_data.get("weapons", [])
-    ids_from_info = {w.get("name", "") for w in weapon_list if "name" in w}
-
-    # Define exclusion patterns
-    exclude_patterns = [
-        re.compile(r"^weapon_000.*xx\d*$"),
-        re.compile(r"^weapon_init.*xx\d*$"),
-        re.compile(r"^transform_weapon_.*"),
-    ]
-
-    # Filter based on both inclusion and exclusion
+    # Filter based on both inclusion and exclusion, straight off the weapon list.
+    # The cheap dict lookup runs first; only named weapons reach the regex.
+    is_excluded = _compile_key_filter(_WEAPON_EXCLUDES)
     filtered = {}
-    for wid in ids_from_info:
-        if any(p.match(wid) for p in exclude_patterns):
+    for w in weapon_list:
+        if "name" not in w:
             continue
+        wid = w["name"]
         english_name = weapons_map.get(wid)
-        if english_name:
-            filtered[wid] = english_name
+        if not english_name or wid in filtered or is_excluded(wid):
+            continue
+        filtered[wid] = english_name
 
     # Write to JSON
     try:
-        with open(output_path, "w", encoding="utf-8") as f:
-            json.dump(filtered, f, ensure_ascii=False, indent=2, sort_keys=True)
+        _dump_json(filtered, output_path)
     except Exception as e:
         raise RuntimeError(f"Failed writing filtered weapons JSON: {e}") from e
 
 
-def export_weapon_evo_data(lang_map: Dict[str, str], output_path: Path) -> None:
-    import re
-    from collections import defaultdict
-
-    skin_pattern = re.compile(r"^(weapon_\w+)_s_\d+$")
-    upgrade_pattern = re.compile(r"^desc_evolution_(weapon_\w+)$")
-
-    weapon_skin_map = defaultdict(list)
-    upgradable_weapons = set()
+def write_weapon_evo_data(weapon_evo: Dict[str, Any], output_path: Path) -> None:
+    """
+    Write the weapon skin / evolution data produced by _classify_langmap() as JSON.
+    """
+    _dump_json(weapon_evo, output_path)
 
-    for key in lang_map:
-        if "/" in key:
-            continue  # Skip keys like weapon/weapon_000
+    print(f"Exported weapon metadata to: {output_path}")
 
-        # Match weapon skins
-        m_skin = skin_pattern.match(key)
-        if m_skin:
-            base_weapon = m_skin.group(1)
-            weapon_skin_map[base_weapon].append(key)
-            continue
 
-        # Match upgradable weapons
-        m_upgrade = upgrade_pattern.match(key)
-        if m_upgrade:
-            weapon_id = m_upgrade.group(1)
-            upgradable_weapons.add(weapon_id)
-            continue
+def export_weapon_evo_data(lang_map: Dict[str, str], output_path: Path) -> None:
+    _, _, weapon_evo = _classify_langmap(lang_map)
+    write_weapon_evo_data(weapon_evo, output_path)
 
-    # Sort outputs
-    weapon_skin_map = {k: sorted(v) for k, v in weapon_skin_map.items()}
-    upgradable_weapon_list = sorted(upgradable_weapons)
 
-    # Final structure
-    result = {
-        "upgradable_weapon": upgradable_weapon_list,
-        "weapon_skin": weapon_skin_map
-    }
+def write_needed_data(needed_data: Dict[str, Dict], output_path: Path) -> None:
+    """
+    Write the needed-data categories produced by _classify_langmap() as JSON.
+    """
+    _dump_json(needed_data, output_path)
 
-    # Write JSON
-    with open(output_path, "w", encoding="utf-8") as f:
-        json.dump(result, f, indent=2, ensure_ascii=False, sort_keys=True)
+    logging.info("Exported: %s", output_path)
 
-    print(f"Exported weapon metadata to: {output_path}")
 
 def export_needed_data_from_langmap(lang_map: Dict[str, str], output_dir: Path) -> None:
+    _, needed_data, _ = _classify_langmap(lang_map)
+    write_needed_data(needed_data, output_dir)
 
-    result = {
-        "skin": defaultdict(dict),         # c1: {c1_skin0: name, ...}
-        "pet": {},                         # p0: name
-        "material": {},                    # material_id: name
-        "character_skill": {}              # Character1_skill_1_name: name
-    }
-
-    # Patterns
-    skin_pattern = re.compile(r"Character(\d+)_name_skin(\d+)")
-    pet_pattern = re.compile(r"Pet_name_(\d+)")
-    material_pattern = re.compile(r'(^material_(?!.*(?:activity|book|fragment|tape|skill|new|money|multi|box)).*)')
-    skill_pattern = re.compile(r"(Character\d+_skill_\d+_name)")
-    for key, value in lang_map.items():
-        # Skins
-        m_skin = skin_pattern.fullmatch(key)
-        if m_skin:
-            char_index, skin_index = m_skin.groups()
-            result["skin"][f"c{char_index}"][f"c{char_index}_skin{skin_index}"] = value
-            continue
 
-        # Pets
-        m_pet = pet_pattern.fullmatch(key)
-        if m_pet:
-            pid = m_pet.group(1)
-            result["pet"][pid] = value
-            continue
+def _start_daemon(fn: Callable[..., Any], *args: Any) -> Future:
+    """
+    Run `fn(*args)` on a daemon thread and return a Future for its result.
+    Unlike ThreadPoolExecutor workers, the thread is not joined at exit, so
+    a failed sibling job can end the process without waiting on this one.
+    """
+    future: Future = Future()
 
-        # Materials
-        m_mat = material_pattern.fullmatch(key)
-        if m_mat:
-            mid = m_mat.group(1)
-            result["material"][mid] = value
-            continue
+    def run() -> None:
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            future.set_result(fn(*args))
+        except BaseException as e:
+            future.set_exception(e)
 
-        # Character Skills
-        m_skill = skill_pattern.fullmatch(key)
-        if m_skill:
-            sid = m_skill.group(1)
-            result["character_skill"][sid] = value
-            continue
+    threading.Thread(target=run, daemon=True).start()
+    return future
 
-    # Convert defaultdict to dict for JSON
-    result["skin"] = dict(result["skin"])
 
-    # Write to JSON
-    with open(output_dir, "w", encoding="utf-8") as f:
-        json.dump(result, f, indent=2, ensure_ascii=False, sort_keys=True)
+def _remove_stale_trash() -> None:
+    """
+    Delete any data.trash-* folders a previous run renamed aside but could
+    not finish removing.
+    """
+    for trash in DATA_DIR.parent.glob(f"{DATA_DIR.name}.trash-*"):
+        try:
+            shutil.rmtree(trash)
+            logging.info("Removed leftover folder: %s", trash)
+        except OSError as e:
+            logging.warning("Could not remove leftover folder %s: %s", trash, e)
 
-    logging.info(f"Exported: {output_dir}")
 
 def main():
+    _remove_stale_trash()
 
     try:
         version, link = get_latest_apk_info()
     except Exception as e:
-        logging.error(f"Failed to get APK info: {e}")
+        logging.error("Failed to get APK info: %s", e)
         sys.exit(1)
 
-    try:
-        sk_extracted = ensure_apk_extracted(version, link)
-    except Exception as e:
-        logging.error(f"Failed to download/extract APK: {e}")
-        sys.exit(1)
+    # The APK and AssetStudio downloads/extractions are independent, so overlap
+    # them, and stop at the first failure instead of waiting out the other.
+    apk_future = _start_daemon(ensure_apk_extracted, version, link)
+    asset_studio_future = _start_daemon(ensure_asset_studio)
+    wait((apk_future, asset_studio_future), return_when=FIRST_EXCEPTION)
 
-    try:
-        global ASSET_STUDIO_DIR
-        ASSET_STUDIO_DIR = ensure_asset_studio()
-    except Exception as e:
-        logging.error(f"Failed to prepare AssetStudio CLI: {e}")
+    if apk_future.done() and apk_future.exception():
+        logging.error("Failed to download/extract APK: %s", apk_future.exception())
         sys.exit(1)
+    if asset_studio_future.done() and asset_studio_future.exception():
+        logging.error(
+            "Failed to prepare AssetStudio CLI: %s", asset_studio_future.exception()
+        )
+        sys.exit(1)
+
+    sk_extracted = apk_future.result()
+    global ASSET_STUDIO_DIR
+    ASSET_STUDIO_DIR = asset_studio_future.result()
 
     try:
         run_asset_extractions(sk_extracted)
     except Exception as e:
-        logging.error(f"AssetStudio extraction failed: {e}")
+        logging.error("AssetStudio extraction failed: %s", e)
         sys.exit(1)
 
     try:
         i2_dat = find_valid_i2_dat()
         records, languages = parse_i2_asset_file(i2_dat)
     except Exception as e:
-        logging.error(f"Failed to parse I2 .dat: {e}")
+        logging.error("Failed to parse I2 .dat: %s", e)
         sys.exit(1)
 
     try:
         csv_path = write_i2_csv(version, records)
     except Exception as e:
-        logging.error(f"Failed writing CSV: {e}")
+        logging.error("Failed writing CSV: %s", e)
         sys.exit(1)
 
-    weapon_json_file = None
     try:
-        for f in EXPORT_DIR.iterdir():
-            if f.name.lower().endswith("weaponinfo.txt"):
-                weapon_json_file = f
-                break
-        if not weapon_json_file:
-            raise FileNotFoundError("WeaponInfo.txt not found under export/")
+        weapon_json_file = find_weapon_info()
     except Exception as e:
-        logging.error(f"Error locating WeaponInfo.txt: {e}")
+        logging.error("Error locating WeaponInfo.txt: %s", e)
         sys.exit(1)
 
     try:
-        lang_maps = build_dictionaries(csv_path)
+        # One CSV pass feeds both the English and Chinese exports.
+        by_language = load_language_maps(csv_path, ["English", "Chinese (Simplified)"])
+        lang_map_cn = by_language["Chinese (Simplified)"]
+        lang_maps, needed_data, weapon_evo = _classify_langmap(by_language["English"])
     except Exception as e:
-        logging.error(f"Failed building language dictionaries: {e}")
+        logging.error("Failed building language dictionaries: %s", e)
         sys.exit(1)
 
     try:
         out_txt = write_master_txt(version, weapon_json_file, lang_maps)
-        logging.info(f"All info fully baked: {out_txt}")
+        logging.info("All info fully baked: %s", out_txt)
     except Exception as e:
-        logging.error(f"Failed baking all info file: {e}")
+        logging.error("Failed baking all info file: %s", e)
         sys.exit(1)
 
     filtered_json_path = SCRIPT_DIR / f"weapons_{version}.json"
-    try:
-        export_filtered_weapons_from_info(
-            weapon_info_path=weapon_json_file,
-            weapons_map=lang_maps["weapons"],
-            output_path=filtered_json_path,
-        )
-        logging.info(f"Filtered weapon JSON written: {filtered_json_path}")
-    except Exception as e:
-        logging.error(f"Failed exporting filtered weapons JSON: {e}")
     weapon_skin_path = SCRIPT_DIR / f"weapon_skins_{version}.json"
-    lang_map = load_language_map(csv_path)
-    lang_map_cn = load_language_map(csv_path,"Chinese (Simplified)")
-    try:
-        export_weapon_evo_data(lang_map, weapon_skin_path)
-        logging.info(f"Weapon evolution data baked : {weapon_skin_path}")
-    except Exception as e:
-        logging.error(f"Cannot export weapon skin: {e}")
-    try:
-        export_needed_data_from_langmap(lang_map, SCRIPT_DIR / f"needed_data_{version}.json")
-        export_needed_data_from_langmap(lang_map_cn, SCRIPT_DIR / f"needed_data_cn_{version}.json")
-        logging.info("Exported needed data for English and Chinese")
-    except Exception as e:
-        logging.warning(f"Can't export: {e}")
-    try:
-        if DATA_DIR.exists():
-            shutil.rmtree(DATA_DIR)
-            logging.info(f"Cleaned up data folder: {DATA_DIR}")
-    except Exception as e:
-        logging.warning(f"Could not remove data folder (maybe in use): {DATA_DIR}: {e}")
+
+    # The exports below are independent; each one logs its own failure so a
+    # broken export never takes the others down.
+    def export_weapons() -> None:
+        try:
+            export_filtered_weapons_from_info(
+                weapon_info_path=weapon_json_file,
+                weapons_map=lang_maps["weapons"],
+                output_path=filtered_json_path,
+            )
+            logging.info("Filtered weapon JSON written: %s", filtered_json_path)
+        except Exception as e:
+            logging.error("Failed exporting filtered weapons JSON: %s", e)
+
+    def export_weapon_skins() -> None:
+        try:
+            write_weapon_evo_data(weapon_evo, weapon_skin_path)
+            logging.info("Weapon evolution data baked : %s", weapon_skin_path)
+        except Exception as e:
+            logging.error("Cannot export weapon skin: %s", e)
+
+    def export_needed_data() -> None:
+        try:
+            write_needed_data(needed_data, SCRIPT_DIR / f"needed_data_{version}.json")
+            export_needed_data_from_langmap(lang_map_cn, SCRIPT_DIR / f"needed_data_cn_{version}.json")
+            logging.info("Exported needed data for English and Chinese")
+        except Exception as e:
+            logging.warning("Can't export: %s", e)
+
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        for task in (export_weapons, export_weapon_skins, export_needed_data):
+            pool.submit(task)
+
+    if DATA_DIR.exists():
+        # Rename first so data/ disappears at once (and fails fast if still
+        # in use); a rename that is left half-deleted is swept up by the
+        # next run.
+        trash = DATA_DIR.with_name(f"{DATA_DIR.name}.trash-{os.getpid()}")
+        try:
+            os.replace(DATA_DIR, trash)
+        except Exception as e:
+            logging.warning(
+                "Could not remove data folder (maybe in use): %s: %s", DATA_DIR, e
+            )
+        else:
+            try:
+                shutil.rmtree(trash)
+                logging.info("Cleaned up data folder: %s", DATA_DIR)
+            except Exception as e:
+                logging.warning(
+                    "Could not finish deleting %s (the next run removes it): %s",
+                    trash,
+                    e,
+                )
 
     logging.info("All done.")
 